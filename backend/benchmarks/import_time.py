@@ -0,0 +1,78 @@
+"""
+Measure import cost of ``manage.py check`` and of a WSGI worker boot.
+
+Runs each target under ``python -X importtime`` and reports the cumulative
+import time of the heaviest top-level packages, so regressions such as
+pandas or scikit-learn being imported at startup are easy to spot.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --top 15 --runs 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Boot a worker the way gunicorn does, then load the URLconf as the first request would
+WORKER_BOOT = (
+    "from django.core.wsgi import get_wsgi_application; get_wsgi_application(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+TARGETS = {
+    'manage.py check': [sys.executable, '-X', 'importtime', 'manage.py', 'check'],
+    'worker boot': [sys.executable, '-X', 'importtime', '-c', WORKER_BOOT],
+}
+
+HEAVY_PACKAGES = ('pandas', 'sklearn', 'scipy', 'numpy')
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def profile(command):
+    """Return ({top-level module: cumulative microseconds}, all imported modules) for one run"""
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recommender.settings')
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f'{" ".join(command)} failed:\n{result.stderr[-2000:]}')
+
+    top_level, imported = {}, set()
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        imported.add(match.group(4))
+        # Top-level imports are not indented; their cumulative time includes children
+        if len(match.group(3)) == 1:
+            top_level[match.group(4)] = int(match.group(2))
+    return top_level, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='runs per target; the median is reported')
+    parser.add_argument('--top', type=int, default=10, help='number of heaviest modules to list')
+    args = parser.parse_args()
+
+    for name, command in TARGETS.items():
+        runs = [profile(command) for _ in range(args.runs)]
+        top_level = [run[0] for run in runs]
+        imported = runs[0][1]
+        modules = {module: statistics.median(run.get(module, 0) for run in top_level) for module in top_level[0]}
+        total = statistics.median(sum(run.values()) for run in top_level)
+
+        print(f'\n{name}: {total / 1000:.0f} ms total import time (median of {args.runs})')
+        for module, micros in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f'  {micros / 1000:8.1f} ms  {module}')
+
+        loaded = [package for package in HEAVY_PACKAGES if package in imported]
+        print(f'  heavy packages imported: {", ".join(loaded) or "none"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Load test comparing the sync (WSGI) and async (ASGI) recommendation endpoints.
+
+Start the same project under both servers, then point this script at them:
+
+    gunicorn movie_recommender.wsgi -w 4 -b 127.0.0.1:8000
+    uvicorn movie_recommender.asgi:application --workers 4 --port 8001
+
+    python benchmarks/load_test.py --movie-id tt0111161 \\
+        --wsgi-url http://127.0.0.1:8000 --asgi-url http://127.0.0.1:8001
+
+Pass ``--sessionid`` (the value of a logged-in ``sessionid`` cookie) to also
+exercise the personalized and watchlist endpoints.
+
+"srv ms" and "db ms" are medians of the ``total`` and ``db`` entries of the
+``Server-Timing`` header. The async views run independent lookups on separate
+threads, so their database time can exceed the time spent waiting for it: at
+``--concurrency 1`` an async endpoint whose "db ms" approaches or passes its
+"srv ms" is overlapping its queries rather than running them back to back.
+"""
+import argparse
+import re
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = {
+    # name: (sync path, async path, needs login)
+    'recommendations': ('/api/movies/recommendations/?movie_id={movie_id}',
+                        '/api/async/movies/recommendations/?movie_id={movie_id}', False),
+    'personalized': ('/api/movies/personalized/', '/api/async/movies/personalized/', True),
+    'watchlist': ('/api/movies/watchlist/', '/api/async/movies/watchlist/', True),
+}
+
+SERVER_TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+def _fetch(url, sessionid):
+    request = urllib.request.Request(url)
+    if sessionid:
+        request.add_header('Cookie', f'sessionid={sessionid}')
+
+    start = time.perf_counter()
+    timings = {}
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            ok = response.status == 200
+            timings = dict(SERVER_TIMING_RE.findall(response.headers.get('Server-Timing', '')))
+    except (urllib.error.URLError, TimeoutError):
+        ok = False
+    return time.perf_counter() - start, ok, timings
+
+
+def run(url, total, concurrency, sessionid):
+    """Fire `total` requests at `url` from `concurrency` threads"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _fetch(url, sessionid), range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _, _ in results)
+    timings = [timing for _, ok, timing in results if ok and timing]
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'server': statistics.median(float(timing.get('total', 0)) for timing in timings) if timings else 0.0,
+        'db': statistics.median(float(timing.get('db', 0)) for timing in timings) if timings else 0.0,
+        'errors': sum(1 for _, ok, _ in results if not ok),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--asgi-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--movie-id', required=True, help='imdb_id to request recommendations for')
+    parser.add_argument('--sessionid', help='sessionid cookie of a logged-in user')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint and server')
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    print(f'{"endpoint":<16} {"server":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+          f'{"srv ms":>8} {"db ms":>8} {"errors":>7}')
+    for name, (sync_path, async_path, needs_login) in ENDPOINTS.items():
+        if needs_login and not args.sessionid:
+            continue
+
+        for server, base_url, path in (('wsgi', args.wsgi_url, sync_path), ('asgi', args.asgi_url, async_path)):
+            url = base_url + path.format(movie_id=args.movie_id)
+            _fetch(url, args.sessionid)  # warm up (model load, connections)
+            result = run(url, args.requests, args.concurrency, args.sessionid)
+            print(f'{name:<16} {server:<6} {result["rps"]:>8.1f} {result["p50"]:>8.1f} '
+                  f'{result["p95"]:>8.1f} {result["server"]:>8.1f} {result["db"]:>8.1f} {result["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
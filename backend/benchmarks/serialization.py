@@ -0,0 +1,66 @@
+"""
+Compare movie list serialization throughput before and after the fast read path.
+
+"serializer" is the previous path: model instances through MovieListSerializer
+and DRF's stdlib JSONRenderer. "values" is the current one: .values() rows
+rendered by ORJSONRenderer. Both include the database query.
+
+    python benchmarks/serialization.py --movies 1000 --rounds 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recommender.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from movie_recommender.renderers import ORJSONRenderer  # noqa: E402
+from movies.api import MOVIE_LIST_FIELDS, MovieListSerializer  # noqa: E402
+from movies.models import Movie  # noqa: E402
+
+
+def serializer_path(queryset):
+    return JSONRenderer().render(MovieListSerializer(list(queryset), many=True).data)
+
+
+def values_path(queryset):
+    return ORJSONRenderer().render(list(queryset.values(*MOVIE_LIST_FIELDS)))
+
+
+def measure(func, queryset, rounds):
+    func(queryset)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(queryset)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--movies', type=int, default=1000, help='movies serialized per round')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    queryset = Movie.objects.order_by('imdb_id')[:args.movies]
+    count = queryset.count()
+    if not count:
+        sys.exit('No movies in the database; run import_movies first.')
+
+    print(f'{count} movies x {args.rounds} rounds')
+    baseline = None
+    for name, func in (('serializer', serializer_path), ('values', values_path)):
+        elapsed = measure(func, queryset, args.rounds)
+        rate = count * args.rounds / elapsed
+        baseline = baseline or rate
+        print(f'  {name:<11} {rate:>10.0f} movies/sec  ({rate / baseline:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Gunicorn configuration sharing one recommendation model between workers.
+
+The master loads the newest published model into shared memory before
+forking, so N workers map the same read-only arrays instead of holding N
+copies. After the background worker publishes a new version, send the master
+SIGHUP (or run ``run_recommender_worker --reload-pidfile``) to share the new
+model and recycle the workers.
+
+    gunicorn movie_recommender.wsgi -c gunicorn.conf.py
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+pidfile = os.environ.get('GUNICORN_PIDFILE', 'gunicorn.pid')
+
+# Import Django, NumPy and SciPy once in the master and share the pages with workers;
+# pandas and scikit-learn are only imported by model builds in the background worker
+preload_app = True
+
+
+def _share_model(server):
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recommender.settings')
+    django.setup()
+
+    from django.db import connections
+    from recommendations.model_store import share_latest_model
+
+    handle = share_latest_model()
+    if handle is None:
+        server.log.warning('No published recommendation model to share yet')
+    else:
+        server.log.info('Sharing recommendation model v%s with workers', handle['version_id'])
+
+    # Workers must not inherit the master's database connections
+    connections.close_all()
+
+
+def on_starting(server):
+    _share_model(server)
+
+
+def on_reload(server):
+    _share_model(server)
+
+
+def on_exit(server):
+    from recommendations import shared_model
+    shared_model.release()
@@ -0,0 +1,39 @@
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+# Catalog data only changes through imports, so slightly stale replica reads are fine.
+# User ratings, watchlists and model bookkeeping stay on the primary for read-your-writes.
+CATALOG_MODELS = {
+    'movies.movie',
+    'movies.director',
+    'movies.actor',
+    'movies.movie_cast',
+}
+
+
+class PrimaryReplicaRouter:
+    """
+    Route catalog reads to the read replica and everything else to the primary.
+
+    Catalog listing, search and the full-table scans of ``_prepare_data``
+    during model builds hit the replica, so they do not compete with user
+    writes. Without a ``replica`` alias every query goes to ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Not label_lower: the database cache routes a stand-in model whose options lack it
+        label = f'{model._meta.app_label}.{model._meta.model_name}'
+        if label in CATALOG_MODELS and REPLICA_ALIAS in settings.DATABASES:
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,206 @@
+"""
+Request-level performance instrumentation.
+
+Every request handled by ``PerformanceMiddleware`` gets a ``RequestMetrics``
+stored in a context variable. Database queries and code wrapped in ``timed()``
+record into it, and the middleware turns the result into a ``Server-Timing``
+header, Prometheus metrics and a slow-request log line.
+
+Metrics are kept in-process, so with several gunicorn workers each worker
+reports its own counters and Prometheus should scrape them individually.
+"""
+import contextvars
+import hmac
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+_request_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Timings collected while handling a single request"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.phases = {}
+        # Async views record from several threads at once
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.query_count += 1
+            self.query_time += seconds
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+def start_request():
+    """Begin collecting metrics for the current request context"""
+    metrics = RequestMetrics()
+    return metrics, _request_metrics.set(metrics)
+
+
+def end_request(token):
+    _request_metrics.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Time a block (or, as a decorator, a function) as a named request phase"""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        PHASE_DURATION.observe(elapsed, phase=phase)
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.add_phase(phase, elapsed)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(perf_counter() - start)
+
+
+def _install_query_hook(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_hooks():
+    """Record queries on every database connection, including ones opened later"""
+    connection_created.connect(_install_query_hook, dispatch_uid='instrumentation_query_hook')
+    for connection in connections.all(initialized_only=True):
+        _install_query_hook(sender=None, connection=connection)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Counter:
+    """A monotonically increasing Prometheus counter"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = _format_labels(zip(self.labelnames, key))
+                lines.append(f'{self.name}{labels} {value}')
+        return lines
+
+
+class Histogram:
+    """A Prometheus histogram with cumulative buckets"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total, observations = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, observations + 1)
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, observations) in sorted(self._values.items()):
+                labels = list(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {observations}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {total}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {observations}')
+        return lines
+
+
+REGISTRY = []
+
+REQUESTS_TOTAL = Counter(
+    'http_requests_total', 'Total HTTP requests handled.', ['view', 'method', 'status']
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests.', ['view', 'method']
+)
+DB_QUERIES_TOTAL = Counter(
+    'db_queries_total', 'Database queries executed while handling requests.', ['view']
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'Total database time per request.', ['view']
+)
+PHASE_DURATION = Histogram(
+    'recommender_phase_duration_seconds',
+    'Time spent in instrumented phases such as build_model, hydration and serialization.',
+    ['phase'],
+)
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
+
+
+def _may_scrape(request):
+    """Staff users, or a scraper sending ``Authorization: Bearer <METRICS_TOKEN>``"""
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if hmac.compare_digest(authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def metrics_view(request):
+    """Expose this process's metrics in the Prometheus text format"""
+    if not _may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,79 @@
+import logging
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import (
+    DB_QUERIES_TOTAL, DB_QUERY_DURATION, REQUEST_DURATION, REQUESTS_TOTAL,
+    end_request, install_query_hooks, start_request,
+)
+
+logger = logging.getLogger('movie_recommender.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Record per-request DB and phase timings.
+
+    Adds a ``Server-Timing`` header, updates the Prometheus metrics served at
+    ``/metrics`` and logs requests slower than ``SLOW_REQUEST_THRESHOLD_MS``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install_query_hooks()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, token = start_request()
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, metrics, perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, metrics, perf_counter() - start)
+
+    def _finish(self, request, response, metrics, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else 'unresolved'
+
+        REQUESTS_TOTAL.inc(view=view, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(duration, view=view, method=request.method)
+        DB_QUERIES_TOTAL.inc(metrics.query_count, view=view)
+        DB_QUERY_DURATION.observe(metrics.query_time, view=view)
+
+        timings = [
+            ('total', duration, None),
+            ('db', metrics.query_time, f'{metrics.query_count} queries'),
+        ] + [(phase, seconds, None) for phase, seconds in metrics.phases.items()]
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.1f}' + (f';desc="{desc}"' if desc else '')
+            for name, seconds, desc in timings
+        )
+
+        if duration * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            breakdown = ', '.join(f'{name}={seconds * 1000:.1f}ms' for name, seconds, _ in timings[2:])
+            logger.warning(
+                'Slow request %s %s (%s) took %.1fms: db=%.1fms over %d queries%s',
+                request.method, request.get_full_path(), view, duration * 1000,
+                metrics.query_time * 1000, metrics.query_count,
+                f', {breakdown}' if breakdown else '',
+            )
+
+        return response
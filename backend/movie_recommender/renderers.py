@@ -0,0 +1,31 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Types orjson does not know (Decimal, lazy translations, ...) go through
+    DRF's encoder. Indented output requested by the browsable API, and
+    environments without orjson, use the stdlib renderer.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialization'):
+            if data is None:
+                return b''
+            if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            # OPT_UTC_Z writes UTC datetimes with a "Z" suffix, as DRF's encoder does
+            return orjson.dumps(
+                data, default=self._encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+            )
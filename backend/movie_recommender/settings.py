@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'movie_recommender.middleware.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -67,9 +68,59 @@ DATABASES = {
         'PASSWORD': 'admin',
         'HOST': 'localhost',
         'PORT': '5432',
+        # Keep connections open between requests and check them before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica; catalog reads and model builds are routed to it (see db_router.py)
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Local development without Postgres: two SQLite aliases on one file stand in for primary and replica
+if os.environ.get('DB_SQLITE'):
+    DATABASES = {
+        alias: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+            'TEST': {'MIRROR': 'default'} if alias == 'replica' else {},
+        }
+        for alias in ('default', 'replica')
+    }
+
+DATABASE_ROUTERS = ['movie_recommender.db_router.PrimaryReplicaRouter']
+
+# The cache must be shared by all workers so invalidating a user's entries reaches every one of them.
+# Without REDIS_URL it lives in a database table created by the movies migrations.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {
+                # One personalized entry per active user; Django's default of 300 would cull constantly
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 200_000)),
+                # Cull a tenth of the entries when full rather than a third
+                'CULL_FREQUENCY': 10,
+            },
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -100,6 +151,23 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Recommendation model storage; models are rebuilt by `manage.py run_recommender_worker`
+RECOMMENDER_MODEL_DIR = os.path.join(BASE_DIR, 'model_store')
+RECOMMENDER_VERSION_CHECK_INTERVAL = 30  # seconds between checks for a newer published model
+RECOMMENDER_KEEP_VERSIONS = 3
+RECOMMENDER_SCORING_WORKERS = 4  # threads for CPU-bound scoring in the async endpoints
+
+# Personalized recommendations are cached per user and invalidated when their ratings or watchlist change
+PERSONALIZED_CACHE_TIMEOUT = 600
+BULK_RATING_MAX_ITEMS = 1000
+USER_STATE_MAX_IDS = 100
+
+# /metrics is served to staff users and to scrapers sending this bearer token
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Requests slower than this are logged with their timing breakdown
+SLOW_REQUEST_THRESHOLD_MS = 500
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -112,6 +180,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'movie_recommender.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
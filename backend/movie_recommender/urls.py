@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from movies.api import MovieViewSet
+from movies import async_views
 from django.conf import settings
 from django.conf.urls.static import static
+from movie_recommender.instrumentation import metrics_view
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -12,7 +14,12 @@ router.register(r'movies', MovieViewSet)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    # Async variants for ASGI servers (uvicorn); same payloads as the viewset actions
+    path('api/async/movies/recommendations/', async_views.recommendations, name='async-movie-recommendations'),
+    path('api/async/movies/personalized/', async_views.personalized, name='async-movie-personalized'),
+    path('api/async/movies/watchlist/', async_views.watchlist, name='async-movie-watchlist'),
     path('api-auth/', include('rest_framework.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Add this only for development
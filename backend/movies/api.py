@@ -2,9 +2,72 @@ from rest_framework import serializers, viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import CursorPagination
 from django.shortcuts import get_object_or_404
-from .models import Movie, Director, Actor, UserRating, UserWatchlist
-from recommendations.recommendation_engine import ContentBasedRecommender, HybridRecommender
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from .models import Movie, Director, Actor, UserRating, UserWatchlist, MovieRatingStats
+from .signals import ratings_changed, personalized_cache_key
+from recommendations.engine import get_content_recommender, get_hybrid_recommender, get_similar_movie_ids
+from movie_recommender.instrumentation import timed
+
+
+def requested_fields(query_params, allowed):
+    """
+    Parse a ``?fields=a,b`` sparse fieldset, keeping the order of `allowed`.
+
+    Unknown names are ignored and imdb_id is always included, so
+    ``?fields=imdb_id`` selects ids alone. All allowed fields are returned
+    when the parameter is absent or names no allowed field.
+    """
+    param = query_params.get('fields')
+    if not param:
+        return list(allowed)
+    wanted = {name.strip() for name in param.split(',')}
+    if wanted.isdisjoint(allowed):
+        return list(allowed)
+    return [name for name in allowed if name in wanted or name == 'imdb_id']
+
+
+def user_movie_rows(queryset, query_params, extra_fields):
+    """
+    Rows of a user's watchlist or ratings as movie list columns plus `extra_fields`.
+
+    Movie columns are read through the join with .values(), so no Movie
+    instances are built and ``?fields=`` limits what the database returns.
+    """
+    fields = requested_fields(query_params, MOVIE_LIST_FIELDS)
+    return queryset.values(*extra_fields, **{field: F(f'movie__{field}') for field in fields})
+
+
+class UserListCursorPagination(CursorPagination):
+    """Keyset pagination over a per-user list; `ordering` matches a (user, -column) index"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class WatchlistPagination(UserListCursorPagination):
+    ordering = '-added_on'
+
+
+class RatingHistoryPagination(UserListCursorPagination):
+    ordering = '-timestamp'
+
+
+class SparseFieldsetMixin:
+    """Drop serializer fields not selected by the request's ``?fields=`` parameter"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None and request.query_params.get('fields'):
+            keep = set(requested_fields(request.query_params, list(self.fields)))
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
 
 
 class DirectorSerializer(serializers.ModelSerializer):
@@ -19,19 +82,21 @@ class ActorSerializer(serializers.ModelSerializer):
         fields = ['name_id', 'name']
 
 
-class MovieSerializer(serializers.ModelSerializer):
+class MovieSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     director = DirectorSerializer(read_only=True)
     cast = ActorSerializer(many=True, read_only=True)
     genres = serializers.JSONField()
     user_rating = serializers.SerializerMethodField()
     in_watchlist = serializers.SerializerMethodField()
+    community_rating = serializers.SerializerMethodField()
     
     class Meta:
         model = Movie
         fields = [
             'imdb_id', 'name', 'poster_url', 'year', 'certificate',
             'runtime', 'genres', 'rating_value', 'rating_count',
-            'summary_text', 'director', 'cast', 'user_rating', 'in_watchlist'
+            'summary_text', 'director', 'cast', 'user_rating', 'in_watchlist',
+            'community_rating'
         ]
     
     def get_user_rating(self, obj):
@@ -49,6 +114,14 @@ class MovieSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated:
             return UserWatchlist.objects.filter(user=request.user, movie=obj).exists()
         return False
+    
+    def get_community_rating(self, obj):
+        """Our own users' ratings, read from the precomputed aggregate row"""
+        try:
+            stats = obj.rating_stats
+        except MovieRatingStats.DoesNotExist:
+            return {'count': 0, 'mean': None}
+        return {'count': stats.rating_count, 'mean': stats.rating_mean}
 
 
 class MovieListSerializer(serializers.ModelSerializer):
@@ -59,6 +132,10 @@ class MovieListSerializer(serializers.ModelSerializer):
         fields = ['imdb_id', 'name', 'poster_url', 'year', 'genres', 'rating_value']
 
 
+# Columns of MovieListSerializer, read with .values() on the list and recommendation paths
+MOVIE_LIST_FIELDS = MovieListSerializer.Meta.fields
+
+
 class UserRatingSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserRating
@@ -66,6 +143,48 @@ class UserRatingSerializer(serializers.ModelSerializer):
         read_only_fields = ['timestamp']
 
 
+class RecommendationQuerySerializer(serializers.Serializer):
+    """Optional filters and diversity settings for similar-movie recommendations"""
+    genres = serializers.CharField(required=False, help_text='Comma-separated; matches any')
+    year_min = serializers.IntegerField(required=False)
+    year_max = serializers.IntegerField(required=False)
+    exclude_watchlist = serializers.BooleanField(required=False, default=False)
+    diversity = serializers.FloatField(required=False, default=0.0, min_value=0, max_value=1)
+    max_per_director = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate_genres(self, value):
+        return [genre.strip() for genre in value.split(',') if genre.strip()]
+    
+    @staticmethod
+    def is_unfiltered(options):
+        """True when validated options ask for plain similarity, which the precomputed table answers"""
+        return not (
+            options.get('genres') or options.get('exclude_watchlist') or options.get('diversity')
+            or options.get('year_min') is not None or options.get('year_max') is not None
+            or options.get('max_per_director') is not None
+        )
+
+
+class RatingField(serializers.FloatField):
+    """A rating given as a JSON number above 0 and up to 5; numeric strings and booleans are rejected"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(max_value=5, **kwargs)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, float)) or not data > 0:
+            self.fail('invalid')
+        return super().to_internal_value(data)
+
+
+class RatingSerializer(serializers.Serializer):
+    rating = RatingField()
+
+
+class BulkRatingItemSerializer(RatingSerializer):
+    movie = serializers.CharField(max_length=50)
+
+
 class MovieViewSet(viewsets.ModelViewSet):
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
@@ -78,29 +197,117 @@ class MovieViewSet(viewsets.ModelViewSet):
             return MovieListSerializer
         return MovieSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.select_related('director', 'rating_stats').prefetch_related('cast')
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Plain dicts from .values() have the same shape as MovieListSerializer output
+        # without instantiating models or running per-field serializers
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*requested_fields(request.query_params, MOVIE_LIST_FIELDS))
+        
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(list(page))
+        return Response(list(rows))
+    
+    def _hydrate(self, recommendations):
+        """Load list columns for engine results, keeping the recommendation order"""
+        fields = requested_fields(self.request.query_params, MOVIE_LIST_FIELDS)
+        with timed('hydration'):
+            movie_ids = [movie['imdb_id'] for movie in recommendations]
+            rows = {row['imdb_id']: row for row in Movie.objects.filter(imdb_id__in=movie_ids).values(*fields)}
+            return [rows[movie_id] for movie_id in movie_ids if movie_id in rows]
+    
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def rate(self, request, imdb_id=None):
         movie = self.get_object()
         user = request.user
-        rating = request.data.get('rating')
         
-        if not rating or not isinstance(rating, (int, float)) or not (0 <= rating <= 5):
+        serializer = RatingSerializer(data=request.data)
+        if not serializer.is_valid():
             return Response(
                 {'error': 'Please provide a valid rating between 0 and 5'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        rating = serializer.validated_data['rating']
         
-        user_rating, created = UserRating.objects.update_or_create(
-            user=user,
-            movie=movie,
-            defaults={'rating': rating}
-        )
+        with transaction.atomic():
+            MovieRatingStats.lock([movie.imdb_id])
+            old_rating = UserRating.objects.select_for_update().filter(
+                user=user, movie=movie
+            ).values_list('rating', flat=True).first()
+            user_rating, created = UserRating.objects.update_or_create(
+                user=user,
+                movie=movie,
+                defaults={'rating': rating}
+            )
+            MovieRatingStats.record_changes({movie.imdb_id: (old_rating, rating)})
+        ratings_changed.send(sender=UserRating, user_id=user.id, movie_ids=[movie.imdb_id])
         
         serializer = UserRatingSerializer(user_rating)
         return Response(serializer.data)
     
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
-    def watchlist(self, request, imdb_id=None):
+    @action(detail=False, methods=['post'], url_path='rate-bulk', permission_classes=[IsAuthenticated])
+    def rate_bulk(self, request):
+        """Create or update many ratings at once: {"ratings": [{"movie": imdb_id, "rating": 4.5}, ...]}"""
+        items = request.data.get('ratings') if isinstance(request.data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Please provide a non-empty list of ratings'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.BULK_RATING_MAX_ITEMS:
+            return Response(
+                {'error': f'A batch may contain at most {settings.BULK_RATING_MAX_ITEMS} ratings'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = BulkRatingItemSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Please provide valid ratings between 0 and 5', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Later entries for the same movie win; a single upsert cannot touch a row twice
+        ratings = {item['movie']: item['rating'] for item in serializer.validated_data}
+        
+        existing_ids = set(Movie.objects.filter(imdb_id__in=ratings).values_list('imdb_id', flat=True))
+        unknown_ids = sorted(set(ratings) - existing_ids)
+        if unknown_ids:
+            return Response(
+                {'error': 'Some movies do not exist', 'unknown_movies': unknown_ids},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user = request.user
+        with transaction.atomic():
+            MovieRatingStats.lock(ratings)
+            old_ratings = dict(
+                UserRating.objects.select_for_update()
+                .filter(user=user, movie_id__in=ratings)
+                .values_list('movie_id', 'rating')
+            )
+            UserRating.objects.bulk_create(
+                [UserRating(user=user, movie_id=movie_id, rating=rating) for movie_id, rating in ratings.items()],
+                update_conflicts=True,
+                unique_fields=['user', 'movie'],
+                update_fields=['rating'],
+            )
+            MovieRatingStats.record_changes({
+                movie_id: (old_ratings.get(movie_id), rating) for movie_id, rating in ratings.items()
+            })
+        ratings_changed.send(sender=UserRating, user_id=user.id, movie_ids=list(ratings))
+        
+        return Response({'status': 'ratings saved', 'count': len(ratings)})
+    
+    @action(detail=True, methods=['post'], url_path='watchlist', permission_classes=[IsAuthenticated])
+    def toggle_watchlist(self, request, imdb_id=None):
         movie = self.get_object()
         user = request.user
         action = request.data.get('action')
@@ -127,56 +334,107 @@ class MovieViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        options = RecommendationQuerySerializer(data=request.query_params)
+        if not options.is_valid():
+            return Response(
+                {'error': 'Invalid recommendation options', 'details': options.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        options = dict(options.validated_data)
+        
         # Check if movie exists
         get_object_or_404(Movie, imdb_id=movie_id)
         
-        # Get recommendations
-        recommender = ContentBasedRecommender()
-        recommendations = recommender.get_recommendations(movie_id)
+        # Unfiltered requests are served from the precomputed neighbour table when it covers the movie
+        if RecommendationQuerySerializer.is_unfiltered(options):
+            neighbor_ids = get_similar_movie_ids(movie_id)
+            if neighbor_ids is not None:
+                return Response(self._hydrate([{'imdb_id': neighbor_id} for neighbor_id in neighbor_ids]))
         
-        # Get movie objects
-        movie_ids = [movie['imdb_id'] for movie in recommendations]
-        movies = Movie.objects.filter(imdb_id__in=movie_ids)
+        if options.pop('exclude_watchlist') and request.user.is_authenticated:
+            options['exclude_ids'] = list(
+                UserWatchlist.objects.filter(user=request.user).values_list('movie_id', flat=True)
+            )
         
-        # Maintain the order of recommendations
-        ordered_movies = []
-        for movie_id in movie_ids:
-            for movie in movies:
-                if movie.imdb_id == movie_id:
-                    ordered_movies.append(movie)
-                    break
+        # Get recommendations from the published model (empty until the first build finishes)
+        recommender = get_content_recommender()
+        recommendations = recommender.get_recommendations(movie_id, **options) if recommender else []
         
-        serializer = MovieListSerializer(ordered_movies, many=True, context={'request': request})
-        return Response(serializer.data)
+        return Response(self._hydrate(recommendations))
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def personalized(self, request):
         user_id = request.user.id
         
-        # Get personalized recommendations
-        recommender = HybridRecommender()
-        recommendations = recommender.get_recommendations_for_user(user_id)
-        
-        # Get movie objects
-        movie_ids = [movie['imdb_id'] for movie in recommendations]
-        movies = Movie.objects.filter(imdb_id__in=movie_ids)
-        
-        # Maintain the order of recommendations
-        ordered_movies = []
-        for movie_id in movie_ids:
-            for movie in movies:
-                if movie.imdb_id == movie_id:
-                    ordered_movies.append(movie)
-                    break
+        # Get personalized recommendations, cached until the user's ratings or watchlist change
+        cache_key = personalized_cache_key(user_id)
+        recommendations = cache.get(cache_key)
+        if recommendations is None:
+            recommender = get_hybrid_recommender()
+            # Movies already on the watchlist are not recommended again
+            watchlist_ids = list(
+                UserWatchlist.objects.filter(user_id=user_id).values_list('movie_id', flat=True)
+            )
+            recommendations = recommender.get_recommendations_for_user(user_id, exclude_ids=watchlist_ids)
+            # The popular-only fallback served before the first model is published is not cached
+            if recommender.content_recommender is not None:
+                cache.set(cache_key, recommendations, settings.PERSONALIZED_CACHE_TIMEOUT)
         
-        serializer = MovieListSerializer(ordered_movies, many=True, context={'request': request})
-        return Response(serializer.data)
+        return Response(self._hydrate(recommendations))
+    
+    def _paginate_user_rows(self, rows, pagination_class):
+        paginator = pagination_class()
+        page = paginator.paginate_queryset(rows, self.request, view=self)
+        return paginator.get_paginated_response(page)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def watchlist(self, request):
-        user = request.user
-        watchlist = UserWatchlist.objects.filter(user=user).select_related('movie')
-        movies = [item.movie for item in watchlist]
+        """The user's watchlist, newest first, in cursor-paginated pages"""
+        rows = user_movie_rows(
+            UserWatchlist.objects.filter(user=request.user), request.query_params, ['added_on']
+        )
+        return self._paginate_user_rows(rows, WatchlistPagination)
+    
+    @action(detail=False, methods=['get'], url_path='rating-history', permission_classes=[IsAuthenticated])
+    def rating_history(self, request):
+        """The user's ratings, newest first, in cursor-paginated pages"""
+        rows = user_movie_rows(
+            UserRating.objects.filter(user=request.user), request.query_params, ['rating', 'timestamp']
+        )
+        return self._paginate_user_rows(rows, RatingHistoryPagination)
+    
+    @action(detail=False, methods=['get'], url_path='user-state', permission_classes=[IsAuthenticated])
+    def user_state(self, request):
+        """Watchlist membership and rating for many movies: ?ids=tt0111161,tt0068646"""
+        movie_ids = list(dict.fromkeys(
+            movie_id.strip() for movie_id in request.query_params.get('ids', '').split(',') if movie_id.strip()
+        ))
         
-        serializer = MovieListSerializer(movies, many=True, context={'request': request})
-        return Response(serializer.data)
\ No newline at end of file
+        if not movie_ids:
+            return Response(
+                {'error': 'Please provide an ids parameter'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(movie_ids) > settings.USER_STATE_MAX_IDS:
+            return Response(
+                {'error': f'At most {settings.USER_STATE_MAX_IDS} ids may be requested at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user = request.user
+        # One query on the primary, which holds the user's latest watchlist and rating writes
+        rows = (
+            Movie.objects.using(router.db_for_write(UserWatchlist))
+            .filter(imdb_id__in=movie_ids)
+            .annotate(
+                in_watchlist=Exists(UserWatchlist.objects.filter(user=user, movie=OuterRef('pk'))),
+                user_rating=Subquery(
+                    UserRating.objects.filter(user=user, movie=OuterRef('pk')).values('rating')[:1]
+                ),
+            )
+            .values_list('imdb_id', 'in_watchlist', 'user_rating')
+        )
+        return Response({
+            movie_id: {'in_watchlist': in_watchlist, 'user_rating': user_rating}
+            for movie_id, in_watchlist, user_rating in rows
+        })
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Async variants of the recommendation endpoints for ASGI deployments.
+
+DRF 3.14 views are sync-only, so these are plain Django async views returning
+the same payloads as the matching ``MovieViewSet`` actions. Independent
+read-only lookups run on separate threads so they overlap, and CPU-bound
+scoring runs in a bounded thread pool, so a uvicorn worker keeps serving
+other requests meanwhile. Authentication is session based.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework.request import Request
+
+from movie_recommender.instrumentation import timed
+from movie_recommender.renderers import ORJSONRenderer
+from recommendations.engine import get_content_recommender, get_hybrid_recommender, get_similar_movie_ids
+from .api import (
+    MOVIE_LIST_FIELDS, RecommendationQuerySerializer, WatchlistPagination, requested_fields, user_movie_rows,
+)
+from .models import Movie, UserWatchlist
+from .signals import personalized_cache_key
+
+_renderer = ORJSONRenderer()
+
+# NumPy releases the GIL while scoring, so threads run in parallel and share the loaded model
+_scoring_pool = ThreadPoolExecutor(
+    max_workers=settings.RECOMMENDER_SCORING_WORKERS, thread_name_prefix='scoring'
+)
+
+
+async def _score(func, *args, **kwargs):
+    """Run CPU-bound scoring in the pool, keeping request instrumentation context"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _scoring_pool, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+def _read(func, *args, **kwargs):
+    """
+    Run an independent read-only lookup on its own thread.
+
+    ``sync_to_async`` and the async ORM default to ``thread_sensitive=True``,
+    which funnels every call in a request through one thread, so lookups
+    passed to ``asyncio.gather`` would still run one after another.
+    """
+    return sync_to_async(_closing_connections, thread_sensitive=False)(func, *args, **kwargs)
+
+
+def _closing_connections(func, *args, **kwargs):
+    # Django only recycles connections on the request's own thread, so apply
+    # CONN_MAX_AGE and CONN_HEALTH_CHECKS around lookups on executor threads too
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _require_get(view):
+    """``require_GET`` for async views; Django 4.2's decorator only wraps sync ones"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = _json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _get_user(request):
+    # Resolving request.user reads the session, so it must happen off the event loop
+    return await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+
+
+def _json_response(data, status=200):
+    """Render with the orjson renderer the DRF views use, timed as the serialization phase"""
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+
+
+def _not_authenticated():
+    return _json_response({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+
+async def _serialize(request, recommendations):
+    fields = requested_fields(request.GET, MOVIE_LIST_FIELDS)
+    with timed('hydration'):
+        movie_ids = [movie['imdb_id'] for movie in recommendations]
+        rows = {
+            row['imdb_id']: row
+            async for row in Movie.objects.filter(imdb_id__in=movie_ids).values(*fields)
+        }
+    return _json_response([rows[movie_id] for movie_id in movie_ids if movie_id in rows])
+
+
+@_require_get
+async def recommendations(request):
+    """Async counterpart of ``GET /api/movies/recommendations/?movie_id=``"""
+    movie_id = request.GET.get('movie_id')
+
+    if not movie_id:
+        return _json_response({'error': 'Please provide a movie_id parameter'}, status=400)
+
+    options = RecommendationQuerySerializer(data=request.GET)
+    if not options.is_valid():
+        return _json_response({'error': 'Invalid recommendation options', 'details': options.errors}, status=400)
+    options = dict(options.validated_data)
+
+    if RecommendationQuerySerializer.is_unfiltered(options):
+        movie_exists, neighbor_ids = await asyncio.gather(
+            _read(Movie.objects.filter(imdb_id=movie_id).exists),
+            _read(get_similar_movie_ids, movie_id),
+        )
+        if not movie_exists:
+            return _json_response({'detail': 'Not found.'}, status=404)
+        if neighbor_ids is not None:
+            return await _serialize(request, [{'imdb_id': neighbor_id} for neighbor_id in neighbor_ids])
+
+    movie_exists, recommender, user = await asyncio.gather(
+        _read(Movie.objects.filter(imdb_id=movie_id).exists),
+        sync_to_async(get_content_recommender)(),
+        _get_user(request),
+    )
+    if not movie_exists:
+        return _json_response({'detail': 'Not found.'}, status=404)
+
+    if options.pop('exclude_watchlist') and user is not None:
+        options['exclude_ids'] = [
+            watchlist_id async for watchlist_id in UserWatchlist.objects.filter(user=user).values_list('movie_id', flat=True)
+        ]
+
+    results = await _score(recommender.get_recommendations, movie_id, **options) if recommender else []
+    return await _serialize(request, results)
+
+
+@_require_get
+async def personalized(request):
+    """
+    Async counterpart of ``GET /api/movies/personalized/``.
+
+    Follows ``HybridRecommender.get_recommendations_for_user`` and shares the
+    sync action's cache. The user's top ratings and watchlist are fetched
+    concurrently; movies already on the watchlist are left out.
+    """
+    user = await _get_user(request)
+    if user is None:
+        return _not_authenticated()
+
+    cache_key = personalized_cache_key(user.id)
+    results = await cache.aget(cache_key)
+    if results is None:
+        num_recommendations = 10
+        recommender = await sync_to_async(get_hybrid_recommender)()
+
+        seed_movie_ids, watchlist_ids = await asyncio.gather(
+            _read(recommender.get_seed_movie_ids, user.id),
+            _read(list, UserWatchlist.objects.filter(user=user).values_list('movie_id', flat=True)),
+        )
+        popular_movies = await _read(recommender.get_popular_movies, num_recommendations * 2, watchlist_ids)
+
+        results = await _score(
+            recommender.combine_recommendations,
+            seed_movie_ids,
+            num_recommendations,
+            popular_movies=popular_movies,
+            exclude_ids=watchlist_ids,
+        )
+        if recommender.content_recommender is not None:
+            await cache.aset(cache_key, results, settings.PERSONALIZED_CACHE_TIMEOUT)
+
+    return await _serialize(request, results)
+
+
+@_require_get
+async def watchlist(request):
+    """Async counterpart of ``GET /api/movies/watchlist/``"""
+    user = await _get_user(request)
+    if user is None:
+        return _not_authenticated()
+
+    # The paginator only needs query parameters and the absolute URL from a DRF request
+    drf_request = Request(request)
+    rows = user_movie_rows(UserWatchlist.objects.filter(user=user), drf_request.query_params, ['added_on'])
+    paginator = WatchlistPagination()
+    page = await sync_to_async(paginator.paginate_queryset)(rows, drf_request)
+    return _json_response(paginator.get_paginated_response(page).data)
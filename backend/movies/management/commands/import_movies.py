@@ -3,6 +3,7 @@ import os
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from movies.models import Movie, Director, Actor
+from recommendations.engine import request_rebuild
 
 class Command(BaseCommand):
     help = 'Import movies from multiple JSON files in a folder'
@@ -45,6 +46,10 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f'All {total_files} JSON files processed successfully.'))
 
+        # The catalog changed, so queue a model rebuild for the background worker
+        request_rebuild('import_movies')
+        self.stdout.write('Queued a recommendation model rebuild.')
+
     def import_movies(self, movies_data):
         movies_to_create = []
         actors_to_create = {}
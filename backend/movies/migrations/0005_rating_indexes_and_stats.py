@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:13
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+import django.db.models.deletion
+
+
+def backfill_rating_stats(apps, schema_editor):
+    """Aggregate existing ratings once; later writes update the stats incrementally"""
+    UserRating = apps.get_model('movies', 'UserRating')
+    MovieRatingStats = apps.get_model('movies', 'MovieRatingStats')
+
+    aggregates = UserRating.objects.values('movie_id').annotate(
+        count=Count('id'), total=Sum('rating'), mean=Avg('rating')
+    )
+    MovieRatingStats.objects.bulk_create(
+        [
+            MovieRatingStats(
+                movie_id=row['movie_id'],
+                rating_count=row['count'],
+                rating_sum=row['total'],
+                rating_mean=row['mean'],
+            )
+            for row in aggregates.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_alter_actor_name_alter_actor_name_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieRatingStats',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to='movies.movie')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('rating_mean', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='userrating',
+            index=models.Index(fields=['user', '-rating', 'timestamp'], name='movies_user_user_id_6252d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userwatchlist',
+            index=models.Index(fields=['user', '-added_on'], name='movies_user_user_id_a70f35_idx'),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_rating_indexes_and_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='actor',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='director',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='name',
+            field=models.CharField(db_index=True, max_length=500),
+        ),
+    ]
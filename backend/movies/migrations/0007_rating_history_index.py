@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_index_names'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userrating',
+            index=models.Index(fields=['user', '-timestamp'], name='movies_user_user_id_ceab85_idx'),
+        ),
+    ]
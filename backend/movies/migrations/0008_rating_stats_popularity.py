@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_popularity(apps, schema_editor):
+    """Compute popularity for existing stats; later writes keep it up to date"""
+    MovieRatingStats = apps.get_model('movies', 'MovieRatingStats')
+    # PRIOR_COUNT and PRIOR_MEAN as of this migration
+    prior_count, prior_mean = 5, 3.0
+    MovieRatingStats.objects.update(
+        popularity=(F('rating_sum') + prior_count * prior_mean) / (F('rating_count') + prior_count)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_rating_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movieratingstats',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=3.0),
+        ),
+        migrations.RunPython(backfill_popularity, migrations.RunPython.noop),
+    ]
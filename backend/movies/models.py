@@ -1,10 +1,12 @@
 from django.db import models
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import NullIf
 from django.contrib.auth.models import User
 
 
 class Director(models.Model):
     name_id = models.CharField(max_length=50, primary_key=True)  # Increased from 20 to 50
-    name = models.CharField(max_length=255)  # Increased from 100 to 255
+    name = models.CharField(max_length=255, db_index=True)  # Increased from 100 to 255
 
     def __str__(self):
         return self.name
@@ -12,7 +14,7 @@ class Director(models.Model):
 
 class Actor(models.Model):
     name_id = models.CharField(max_length=50, primary_key=True)  # Increased from 20 to 50
-    name = models.CharField(max_length=255)  # Increased from 100 to 255
+    name = models.CharField(max_length=255, db_index=True)  # Increased from 100 to 255
 
     def __str__(self):
         return self.name
@@ -20,7 +22,7 @@ class Actor(models.Model):
 
 class Movie(models.Model):
     imdb_id = models.CharField(max_length=50, primary_key=True)  # Increased from 20 to 50
-    name = models.CharField(max_length=500)  # Increased from 255 to 500
+    name = models.CharField(max_length=500, db_index=True)  # Increased from 255 to 500
     poster_url = models.URLField(max_length=1000, blank=True, null=True)  # Increased from 500 to 1000
     year = models.CharField(max_length=20, blank=True, null=True)  # Increased from 10 to 20
     certificate = models.CharField(max_length=50, blank=True, null=True)  # Increased from 20 to 50
@@ -44,6 +46,12 @@ class UserRating(models.Model):
 
     class Meta:
         unique_together = ('user', 'movie')
+        indexes = [
+            # Serves a user's top ratings (rating__gte ... order_by('-rating'))
+            models.Index(fields=['user', '-rating', 'timestamp']),
+            # Serves the cursor-paginated rating history
+            models.Index(fields=['user', '-timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.movie.name} - {self.rating}"
@@ -56,6 +64,81 @@ class UserWatchlist(models.Model):
 
     class Meta:
         unique_together = ('user', 'movie')
+        indexes = [
+            models.Index(fields=['user', '-added_on']),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.movie.name}"
+
+
+class MovieRatingStats(models.Model):
+    """Count and mean of our own users' ratings for a movie, kept up to date on every rating write"""
+    # `popularity` shrinks the mean toward PRIOR_MEAN as if PRIOR_COUNT extra ratings had it,
+    # so a movie with a single 5-star rating does not outrank one with hundreds of 4.5s
+    PRIOR_COUNT = 5
+    PRIOR_MEAN = 3.0
+
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats')
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    rating_mean = models.FloatField(blank=True, null=True)
+    popularity = models.FloatField(default=PRIOR_MEAN, db_index=True)
+
+    def __str__(self):
+        return f"{self.movie_id}: {self.rating_mean} ({self.rating_count} ratings)"
+
+    @classmethod
+    def lock(cls, movie_ids):
+        """
+        Create missing stats rows for `movie_ids` and lock them until the transaction ends.
+
+        Rating writers call this before reading the old ratings they replace. A user's
+        first rating of a movie has no UserRating row to lock, so without it two concurrent
+        first ratings would both count as new.
+        """
+        movie_ids = sorted(movie_ids)
+        cls.objects.bulk_create([cls(movie_id=movie_id) for movie_id in movie_ids], ignore_conflicts=True)
+        # A fixed order keeps writers locking overlapping movies from deadlocking
+        list(cls.objects.select_for_update().filter(movie_id__in=movie_ids).order_by('movie_id').values_list('pk'))
+
+    @classmethod
+    def record_changes(cls, changes):
+        """
+        Apply rating writes to the aggregates in a single UPDATE.
+
+        ``changes`` maps movie ids to ``(old_rating, new_rating)``, where
+        ``old_rating`` is None for a new rating and ``new_rating`` is None
+        for a deleted one.
+        """
+        if not changes:
+            return
+
+        # A deleted rating always has a stats row, which may itself be going away with its movie
+        cls.objects.bulk_create(
+            [cls(movie_id=movie_id) for movie_id, (old, new) in changes.items() if old is None],
+            ignore_conflicts=True,
+        )
+
+        count_delta = Case(
+            *[
+                When(movie_id=movie_id, then=Value((new is not None) - (old is not None)))
+                for movie_id, (old, new) in changes.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        sum_delta = Case(
+            *[When(movie_id=movie_id, then=Value((new or 0) - (old or 0))) for movie_id, (old, new) in changes.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        # Both sides of the assignment see the old row values
+        new_count = F('rating_count') + count_delta
+        new_sum = F('rating_sum') + sum_delta
+        cls.objects.filter(movie_id__in=changes).update(
+            rating_count=new_count,
+            rating_sum=new_sum,
+            rating_mean=new_sum / NullIf(new_count, 0),
+            popularity=(new_sum + cls.PRIOR_COUNT * cls.PRIOR_MEAN) / (new_count + cls.PRIOR_COUNT),
+        )
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import MovieRatingStats, UserRating, UserWatchlist
+
+# Sent once per request that creates or updates ratings, with user_id and movie_ids
+ratings_changed = Signal()
+
+
+def personalized_cache_key(user_id):
+    return f'personalized:{user_id}'
+
+
+@receiver(ratings_changed)
+def invalidate_personalized_recommendations(sender, user_id, movie_ids, **kwargs):
+    cache.delete(personalized_cache_key(user_id))
+
+
+@receiver(post_delete, sender=UserRating)
+def remove_deleted_rating_from_stats(sender, instance, **kwargs):
+    # Covers deletes outside the rating endpoints, e.g. the admin or a user's cascade delete
+    MovieRatingStats.record_changes({instance.movie_id: (instance.rating, None)})
+    cache.delete(personalized_cache_key(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=UserWatchlist)
+def invalidate_personalized_on_watchlist_change(sender, instance, **kwargs):
+    # Personalized recommendations leave out watchlist movies
+    cache.delete(personalized_cache_key(instance.user_id))
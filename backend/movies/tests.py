@@ -1,3 +1,118 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Movie, MovieRatingStats, UserRating
+
+
+# A replica test mirror has its own connection and would not see rows created inside the
+# test's transaction, so every query goes to the primary here
+@override_settings(DATABASE_ROUTERS=[])
+class MovieRatingStatsTests(TestCase):
+    """MovieRatingStats must always equal an aggregate over UserRating"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rater', password='secret')
+        self.movies = [Movie.objects.create(imdb_id=f'tt000000{i}', name=f'Movie {i}') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rate(self, movie, rating):
+        return self.client.post(f'/api/movies/{movie.imdb_id}/rate/', {'rating': rating}, format='json')
+
+    def rate_bulk(self, ratings):
+        return self.client.post('/api/movies/rate-bulk/', {'ratings': ratings}, format='json')
+
+    def assertStats(self, movie, count, total):
+        stats = MovieRatingStats.objects.get(movie=movie)
+        self.assertEqual(stats.rating_count, count)
+        self.assertAlmostEqual(stats.rating_sum, total)
+        if count:
+            self.assertAlmostEqual(stats.rating_mean, total / count)
+        else:
+            self.assertIsNone(stats.rating_mean)
+        prior = MovieRatingStats.PRIOR_COUNT
+        self.assertAlmostEqual(stats.popularity, (total + prior * MovieRatingStats.PRIOR_MEAN) / (count + prior))
+
+    def test_new_rating(self):
+        self.assertEqual(self.rate(self.movies[0], 4).status_code, 200)
+        self.assertStats(self.movies[0], 1, 4)
+
+    def test_updated_rating_changes_sum_only(self):
+        self.rate(self.movies[0], 4)
+        self.rate(self.movies[0], 2.5)
+        self.assertStats(self.movies[0], 1, 2.5)
+
+    def test_ratings_from_several_users(self):
+        other = User.objects.create_user('other', password='secret')
+        UserRating.objects.create(user=other, movie=self.movies[0], rating=5)
+        MovieRatingStats.record_changes({self.movies[0].imdb_id: (None, 5)})
+        self.rate(self.movies[0], 3)
+        self.assertStats(self.movies[0], 2, 8)
+
+    def test_bulk_duplicate_movie_counts_once(self):
+        response = self.rate_bulk([
+            {'movie': self.movies[0].imdb_id, 'rating': 3},
+            {'movie': self.movies[1].imdb_id, 'rating': 4},
+            {'movie': self.movies[0].imdb_id, 'rating': 5},
+        ])
+        self.assertEqual(response.status_code, 200)
+        # The later entry for the same movie wins
+        self.assertStats(self.movies[0], 1, 5)
+        self.assertStats(self.movies[1], 1, 4)
+
+    def test_bulk_mixes_new_and_updated_ratings(self):
+        self.rate(self.movies[0], 2)
+        self.rate_bulk([
+            {'movie': self.movies[0].imdb_id, 'rating': 4},
+            {'movie': self.movies[2].imdb_id, 'rating': 1},
+        ])
+        self.assertStats(self.movies[0], 1, 4)
+        self.assertStats(self.movies[2], 1, 1)
+
+    def test_deleted_rating(self):
+        self.rate(self.movies[0], 4)
+        UserRating.objects.get(user=self.user, movie=self.movies[0]).delete()
+        self.assertStats(self.movies[0], 0, 0)
+
+    def test_user_delete_cascades_to_stats(self):
+        self.rate_bulk([{'movie': movie.imdb_id, 'rating': 4} for movie in self.movies])
+        self.user.delete()
+        for movie in self.movies:
+            self.assertStats(movie, 0, 0)
+
+    def test_movie_delete_removes_stats(self):
+        self.rate(self.movies[0], 4)
+        self.movies[0].delete()
+        self.assertFalse(MovieRatingStats.objects.filter(movie_id=self.movies[0].imdb_id).exists())
+
+    def test_admin_edit_moves_rating_between_movies(self):
+        self.rate(self.movies[0], 4)
+        rating = UserRating.objects.get(user=self.user, movie=self.movies[0])
+        admin_user = User.objects.create_superuser('staff', password='secret')
+        self.client.force_login(admin_user)
+        response = self.client.post(f'/admin/movies/userrating/{rating.pk}/change/', {
+            'user': self.user.pk, 'movie': self.movies[1].imdb_id, 'rating': 2,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertStats(self.movies[0], 0, 0)
+        self.assertStats(self.movies[1], 1, 2)
+
+    def test_stats_are_read_only_in_admin(self):
+        self.rate(self.movies[0], 4)
+        self.client.force_login(User.objects.create_superuser('staff', password='secret'))
+        self.assertEqual(self.client.get('/admin/movies/movieratingstats/add/').status_code, 403)
+        response = self.client.post(
+            f'/admin/movies/movieratingstats/{self.movies[0].imdb_id}/change/',
+            {'rating_count': 10, 'rating_sum': 50, 'popularity': 5},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertStats(self.movies[0], 1, 4)
+
+    def test_endpoints_validate_ratings_alike(self):
+        for rating in (0, '4', True, 5.5, None):
+            self.assertEqual(self.rate(self.movies[0], rating).status_code, 400, rating)
+            self.assertEqual(
+                self.rate_bulk([{'movie': self.movies[0].imdb_id, 'rating': rating}]).status_code, 400, rating
+            )
+        self.assertFalse(MovieRatingStats.objects.exists())
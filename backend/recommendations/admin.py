@@ -1,3 +1,5 @@
 from django.contrib import admin
+from .models import ModelVersion, ModelBuildJob
 
-# Register your models here.
+admin.site.register(ModelVersion)
+admin.site.register(ModelBuildJob)
@@ -0,0 +1,46 @@
+"""
+Lightweight entry points to the recommendation engine.
+
+Importing this module is cheap: NumPy, SciPy and the engine itself are only
+imported on first use, and pandas/scikit-learn only when a model is built.
+URL configuration, management commands and tests therefore do not pay for
+them unless they actually score. Under gunicorn the master imports them once
+while preloading the shared model (see ``gunicorn.conf.py``).
+"""
+
+
+def get_content_recommender():
+    """Return the recommender for the newest published model, or None"""
+    from .model_store import get_content_recommender
+    return get_content_recommender()
+
+
+def get_hybrid_recommender():
+    """Return a HybridRecommender backed by the newest published model"""
+    from .recommendation_engine import HybridRecommender
+    return HybridRecommender(get_content_recommender())
+
+
+def get_similar_movie_ids(movie_id, limit=10):
+    """
+    Return precomputed neighbours of a movie (see ``export_similar_movies``),
+    or None unless the newest published model was exported and covers this
+    movie and limit; callers then score with the live engine.
+    """
+    from django.db.models import Subquery
+    from .models import ModelVersion, MovieSimilarity
+    latest_version = ModelVersion.objects.order_by('-id').values('id')[:1]
+    neighbor_ids = (
+        MovieSimilarity.objects.filter(movie_id=movie_id, version_id=Subquery(latest_version))
+        .values_list('neighbor_ids', flat=True)
+        .first()
+    )
+    if neighbor_ids is None or len(neighbor_ids) < limit:
+        return None
+    return neighbor_ids[:limit]
+
+
+def request_rebuild(reason=''):
+    """Queue a model rebuild for the background worker"""
+    from .model_store import request_rebuild
+    return request_rebuild(reason)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from recommendations.model_store import load_model
+from recommendations.models import ModelVersion
+from recommendations.similarity_export import export_to_json, export_to_table
+
+
+class Command(BaseCommand):
+    help = "Export every movie's top-K similar movies from the newest model to a table and/or JSON shards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10, help='Neighbours stored per movie')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Movies scored and inserted per batch')
+        parser.add_argument('--json-dir', help='Also write static JSON shards to this directory')
+        parser.add_argument('--prefix-length', type=int, default=5, help='imdb_id characters used to name shards')
+        parser.add_argument('--no-table', action='store_true', help='Skip writing the MovieSimilarity table')
+
+    def handle(self, *args, **kwargs):
+        version = ModelVersion.objects.order_by('-id').first()
+        if version is None:
+            self.stderr.write(self.style.ERROR('No published model; run run_recommender_worker first.'))
+            return
+
+        self.stdout.write(f'Loading model v{version.pk}')
+        recommender = load_model(version)
+
+        if not kwargs['no_table']:
+            count = export_to_table(version, recommender, kwargs['top_k'], kwargs['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote neighbours for {count} movies to MovieSimilarity'))
+
+        if kwargs['json_dir']:
+            shards = export_to_json(
+                version, recommender, kwargs['json_dir'],
+                kwargs['top_k'], kwargs['prefix_length'], kwargs['chunk_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'Wrote {shards} JSON shards to {kwargs["json_dir"]}'))
@@ -0,0 +1,63 @@
+import os
+import signal
+import time
+from django.core.management.base import BaseCommand
+from recommendations.model_store import claim_next_job, load_model, request_rebuild, run_job
+from recommendations.similarity_export import export_to_table
+
+
+class Command(BaseCommand):
+    help = 'Process queued recommendation model rebuilds in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process pending jobs and exit instead of polling')
+        parser.add_argument('--enqueue', action='store_true', help='Queue a rebuild before processing jobs')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to wait between queue polls')
+        parser.add_argument(
+            '--reload-pidfile',
+            help='Gunicorn pidfile; the master is sent SIGHUP to share each newly published model',
+        )
+        parser.add_argument(
+            '--export-similar', action='store_true',
+            help='Refresh the MovieSimilarity table after each published model',
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['enqueue']:
+            request_rebuild('run_recommender_worker --enqueue')
+
+        self.stdout.write(self.style.SUCCESS('Recommender worker started.'))
+
+        while True:
+            job = claim_next_job()
+
+            if job is None:
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['poll_interval'])
+                continue
+
+            self.stdout.write(f'Building model for job {job.pk} ({job.reason or "no reason given"})')
+            version = run_job(job)
+
+            if version is None:
+                self.stderr.write(self.style.ERROR(f'Job {job.pk} failed: {job.error}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Published model v{version.pk} with {version.movie_count} movies '
+                    f'in {version.build_seconds:.1f}s'
+                ))
+                if kwargs['export_similar']:
+                    count = export_to_table(version, load_model(version))
+                    self.stdout.write(f'Exported similar movies for {count} movies.')
+                if kwargs['reload_pidfile']:
+                    self.reload_gunicorn(kwargs['reload_pidfile'])
+
+    def reload_gunicorn(self, pidfile):
+        try:
+            with open(pidfile) as fh:
+                os.kill(int(fh.read().strip()), signal.SIGHUP)
+        except (OSError, ValueError) as e:
+            self.stderr.write(self.style.WARNING(f'Could not reload gunicorn from {pidfile}: {e}'))
+        else:
+            self.stdout.write('Sent SIGHUP to gunicorn to share the new model.')
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('artifact_path', models.CharField(max_length=500)),
+                ('movie_count', models.PositiveIntegerField(default=0)),
+                ('build_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-id'],
+                'get_latest_by': 'id',
+            },
+        ),
+        migrations.CreateModel(
+            name='ModelBuildJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('requested_on', models.DateTimeField(auto_now_add=True)),
+                ('started_on', models.DateTimeField(blank=True, null=True)),
+                ('finished_on', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='recommendations.modelversion')),
+            ],
+            options={
+                'ordering': ['requested_on'],
+                'indexes': [models.Index(fields=['status', 'requested_on'], name='recommendat_status_9ea3b8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movie_id', models.CharField(max_length=50)),
+                ('neighbor_ids', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='recommendations.modelversion')),
+            ],
+            options={
+                'unique_together': {('movie_id', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,209 @@
+"""
+Versioned storage for the content-based recommendation model.
+
+Models are built by the background worker (``manage.py run_recommender_worker``),
+written to ``RECOMMENDER_MODEL_DIR`` and published as a ``ModelVersion`` row.
+Serving processes never build a model themselves: they load the newest published
+version and swap it in atomically, so requests that arrive during a rebuild keep
+using the previous version.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from movie_recommender.instrumentation import timed
+
+from .models import ModelBuildJob, ModelVersion
+from . import shared_model
+from .recommendation_engine import ContentBasedRecommender
+
+logger = logging.getLogger(__name__)
+
+
+class _ActiveModel:
+    def __init__(self, version_id, recommender, shared=False):
+        self.version_id = version_id
+        self.recommender = recommender
+        # Shared models are mapped from the gunicorn master and replaced by reloading it
+        self.shared = shared
+
+
+_active = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _model_path(filename):
+    return os.path.join(settings.RECOMMENDER_MODEL_DIR, filename)
+
+
+def save_model(recommender):
+    """Write a built recommender to the model directory and return its filename"""
+    os.makedirs(settings.RECOMMENDER_MODEL_DIR, exist_ok=True)
+    filename = f"model-{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.npz"
+    tmp_path = _model_path(f".{filename}.tmp")
+
+    # Write to a temporary file first so readers never see a partial artifact
+    with open(tmp_path, 'wb') as fh:
+        np.savez(fh, **recommender.to_arrays())
+    os.replace(tmp_path, _model_path(filename))
+
+    return filename
+
+
+@timed('load_model')
+def load_model(version):
+    """Load the recommender stored for a published ModelVersion"""
+    with np.load(_model_path(version.artifact_path)) as arrays:
+        return ContentBasedRecommender.from_arrays(arrays)
+
+
+def build_and_publish():
+    """Build a fresh model and publish it as a new version"""
+    started = time.monotonic()
+    recommender = ContentBasedRecommender()
+    recommender.build_model()
+    filename = save_model(recommender)
+
+    version = ModelVersion.objects.create(
+        artifact_path=filename,
+        movie_count=len(recommender.movie_indices),
+        build_seconds=time.monotonic() - started,
+    )
+    _prune_old_versions()
+
+    return version
+
+
+def share_latest_model():
+    """Load the newest published version into shared memory for forked workers"""
+    latest = ModelVersion.objects.order_by('-id').first()
+    if latest is None:
+        return None
+
+    shared_model.release()
+    return shared_model.publish(latest.pk, load_model(latest))
+
+
+def _prune_old_versions():
+    """Delete artifacts of versions beyond RECOMMENDER_KEEP_VERSIONS"""
+    stale = ModelVersion.objects.order_by('-id')[settings.RECOMMENDER_KEEP_VERSIONS:]
+    for version in stale:
+        try:
+            os.remove(_model_path(version.artifact_path))
+        except FileNotFoundError:
+            pass
+        version.delete()
+
+
+def request_rebuild(reason=''):
+    """Queue a model rebuild unless one is already waiting to run"""
+    pending = ModelBuildJob.objects.filter(status=ModelBuildJob.STATUS_PENDING).first()
+    if pending is not None:
+        return pending
+    return ModelBuildJob.objects.create(reason=reason[:255])
+
+
+def claim_next_job():
+    """Atomically claim the oldest pending build job, or return None"""
+    with transaction.atomic():
+        job = (
+            ModelBuildJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ModelBuildJob.STATUS_PENDING)
+            .order_by('requested_on')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = ModelBuildJob.STATUS_RUNNING
+        job.started_on = timezone.now()
+        job.save(update_fields=['status', 'started_on'])
+
+    return job
+
+
+def run_job(job):
+    """Build and publish a model for a claimed job, recording the outcome"""
+    try:
+        version = build_and_publish()
+    except Exception as e:
+        logger.exception("Model build job %s failed", job.pk)
+        job.status = ModelBuildJob.STATUS_FAILED
+        job.error = str(e)
+        job.finished_on = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_on'])
+        return None
+
+    finished_on = timezone.now()
+    job.status = ModelBuildJob.STATUS_DONE
+    job.version = version
+    job.finished_on = finished_on
+    job.save(update_fields=['status', 'version', 'finished_on'])
+
+    # Requests queued before this build started are satisfied by it as well
+    ModelBuildJob.objects.filter(
+        status=ModelBuildJob.STATUS_PENDING,
+        requested_on__lte=job.started_on,
+    ).update(status=ModelBuildJob.STATUS_DONE, version=version, finished_on=finished_on)
+
+    return version
+
+
+def get_content_recommender():
+    """
+    Return the recommender for the newest published model version.
+
+    The database is checked for a newer version at most once every
+    RECOMMENDER_VERSION_CHECK_INTERVAL seconds. Only one thread loads a new
+    version while the others keep serving the current one; the swap itself is
+    a single reference assignment. Returns None until a first version exists.
+
+    When the parent process shared a model (see ``shared_model``), that model
+    is mapped and served as-is; newer versions are picked up by reloading the
+    gunicorn master rather than by loading a private copy in every worker.
+    """
+    global _active, _last_check
+
+    now = time.monotonic()
+    if _active is not None and (_active.shared or now - _last_check < settings.RECOMMENDER_VERSION_CHECK_INTERVAL):
+        return _active.recommender
+
+    # Without a model there is nothing to serve, so wait for the loading thread
+    if not _lock.acquire(blocking=_active is None):
+        return _active.recommender
+
+    try:
+        if _active is not None and time.monotonic() - _last_check < settings.RECOMMENDER_VERSION_CHECK_INTERVAL:
+            return _active.recommender
+        _last_check = time.monotonic()
+
+        if _active is None:
+            attached = shared_model.attach()
+            if attached is not None:
+                _active = _ActiveModel(*attached, shared=True)
+                logger.info("Mapped shared recommendation model v%s", _active.version_id)
+                return _active.recommender
+
+        latest = ModelVersion.objects.order_by('-id').first()
+        if latest is None:
+            request_rebuild('no published model')
+            return None
+
+        if _active is None or _active.version_id != latest.pk:
+            try:
+                _active = _ActiveModel(latest.pk, load_model(latest))
+                logger.info("Loaded recommendation model v%s", latest.pk)
+            except (OSError, KeyError):
+                logger.exception("Could not load recommendation model v%s", latest.pk)
+
+        return _active.recommender if _active is not None else None
+    finally:
+        _lock.release()
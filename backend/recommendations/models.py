@@ -1,3 +1,63 @@
 from django.db import models
 
-# Create your models here.
+
+class ModelVersion(models.Model):
+    """A published, immutable build of the content-based recommendation model"""
+    created_on = models.DateTimeField(auto_now_add=True)
+    artifact_path = models.CharField(max_length=500)
+    movie_count = models.PositiveIntegerField(default=0)
+    build_seconds = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-id']
+        get_latest_by = 'id'
+
+    def __str__(self):
+        return f"v{self.pk} ({self.movie_count} movies)"
+
+
+class MovieSimilarity(models.Model):
+    """Precomputed top-K similar movies for one movie, exported from a model version"""
+    version = models.ForeignKey(ModelVersion, on_delete=models.CASCADE, related_name='similarities')
+    movie_id = models.CharField(max_length=50)
+    neighbor_ids = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ('movie_id', 'version')
+
+    def __str__(self):
+        return f"{self.movie_id} (v{self.version_id})"
+
+
+class ModelBuildJob(models.Model):
+    """A queued request to rebuild the recommendation model off the request path"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    reason = models.CharField(max_length=255, blank=True)
+    requested_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(blank=True, null=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    version = models.ForeignKey(
+        ModelVersion, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs'
+    )
+
+    class Meta:
+        ordering = ['requested_on']
+        indexes = [
+            models.Index(fields=['status', 'requested_on']),
+        ]
+
+    def __str__(self):
+        return f"Build job {self.pk} ({self.status})"
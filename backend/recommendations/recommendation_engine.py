@@ -1,25 +1,224 @@
-import pandas as pd
+# pandas and scikit-learn are only needed to build a model, so they are imported
+# inside build_model(); serving a published model needs NumPy and SciPy alone.
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from movies.models import Movie, UserRating
+from scipy.sparse import csr_matrix
+from django.db.models import F
+from movies.models import Movie, MovieRatingStats, UserRating
+from movie_recommender.instrumentation import timed
+
+
+class StringColumn:
+    """Strings packed into one UTF-8 byte array plus offsets, so they can live in shared memory"""
+    
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+    
+    @classmethod
+    def from_list(cls, values):
+        encoded = [str(value).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+    
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+
+class IdIndex:
+    """
+    imdb_id -> movie index lookup by binary search over sorted fixed-width ids.
+    
+    Unlike a dict, it is two flat arrays, so it can be shared between
+    processes and holds no per-movie Python objects.
+    """
+    
+    def __init__(self, sorted_ids, positions):
+        self.sorted_ids = sorted_ids
+        self.positions = positions
+    
+    @classmethod
+    def from_list(cls, ids):
+        encoded = np.array([str(movie_id).encode('utf-8') for movie_id in ids], dtype=np.bytes_)
+        order = np.argsort(encoded, kind='stable')
+        return cls(encoded[order], order.astype(np.int64))
+    
+    def __len__(self):
+        return len(self.sorted_ids)
+    
+    def lookup(self, ids):
+        """Movie indices of the given ids, skipping unknown ones"""
+        if not len(self.sorted_ids):
+            return np.array([], dtype=np.int64)
+        keys = np.array([str(movie_id).encode('utf-8') for movie_id in ids], dtype=np.bytes_)
+        found = np.searchsorted(self.sorted_ids, keys)
+        found = np.minimum(found, len(self.sorted_ids) - 1)
+        matches = self.sorted_ids[found] == keys
+        return self.positions[found[matches]]
+    
+    def get(self, movie_id, default=None):
+        indices = self.lookup([movie_id])
+        return int(indices[0]) if len(indices) else default
+    
+    def __contains__(self, movie_id):
+        return self.get(movie_id) is not None
+    
+    def to_arrays(self):
+        return {'id_index_sorted': self.sorted_ids, 'id_index_positions': self.positions}
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['id_index_sorted'], arrays['id_index_positions'])
+
+
+class MovieFeatures:
+    """Array-backed imdb_id/name/year columns returned with recommendations"""
+    
+    COLUMNS = ('imdb_id', 'name', 'year')
+    
+    def __init__(self, columns):
+        self.columns = columns
+    
+    @classmethod
+    def from_records(cls, records):
+        return cls({
+            column: StringColumn.from_list(record[column] for record in records)
+            for column in cls.COLUMNS
+        })
+    
+    def __len__(self):
+        return len(self.columns['imdb_id'])
+    
+    def records(self, indices):
+        """Return rows at the given indices as dicts"""
+        return [
+            {column: self.columns[column][i] for column in self.COLUMNS}
+            for i in indices
+        ]
+    
+    def to_arrays(self):
+        arrays = {}
+        for column, values in self.columns.items():
+            arrays[f'{column}_data'] = values.data
+            arrays[f'{column}_offsets'] = values.offsets
+        return arrays
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls({
+            column: StringColumn(arrays[f'{column}_data'], arrays[f'{column}_offsets'])
+            for column in cls.COLUMNS
+        })
+
+
+class MovieFilterIndex:
+    """
+    Per-movie filter data aligned with the model's movie indices.
+    
+    Genres are stored as one packed bitset per genre, so a genre filter is a
+    bitwise OR of a few rows instead of a scan over every movie's genre list.
+    """
+    
+    def __init__(self, genre_names, genre_bits, years, director_codes):
+        self.genre_names = genre_names
+        self.genre_bits = genre_bits
+        self.years = years
+        self.director_codes = director_codes
+        self.genre_codes = {name.lower(): code for code, name in enumerate(genre_names.tolist())}
+    
+    @classmethod
+    def from_records(cls, records):
+        """Build from dicts with 'genres', 'year' and 'director_id' keys, in movie index order"""
+        # Imported genre lists carry stray whitespace (e.g. ' Comedy')
+        genre_names = sorted({genre.strip() for record in records for genre in (record['genres'] or [])})
+        genre_codes = {name: code for code, name in enumerate(genre_names)}
+        
+        has_genre = np.zeros((len(genre_names), len(records)), dtype=bool)
+        years = np.zeros(len(records), dtype=np.int16)
+        director_ids = {}
+        director_codes = np.full(len(records), -1, dtype=np.int32)
+        
+        for i, record in enumerate(records):
+            for genre in record['genres'] or []:
+                has_genre[genre_codes[genre.strip()], i] = True
+            # Years look like '1993' or '1993 TV Movie'; 0 means unknown
+            year = str(record['year'] or '')[:4]
+            years[i] = int(year) if year.isdigit() else 0
+            if record['director_id']:
+                director_codes[i] = director_ids.setdefault(record['director_id'], len(director_ids))
+        
+        return cls(
+            StringColumn.from_list(genre_names),
+            np.packbits(has_genre, axis=1),
+            years,
+            director_codes,
+        )
+    
+    def mask(self, genres=None, year_min=None, year_max=None):
+        """Boolean mask of movies matching any of `genres` and the year range"""
+        mask = np.ones(len(self.years), dtype=bool)
+        
+        if genres:
+            wanted = {genre.strip().lower() for genre in genres}
+            codes = [self.genre_codes[genre] for genre in wanted if genre in self.genre_codes]
+            if not codes:
+                return np.zeros(len(self.years), dtype=bool)
+            combined = np.bitwise_or.reduce(self.genre_bits[codes], axis=0)
+            mask &= np.unpackbits(combined, count=len(self.years)).astype(bool)
+        if year_min is not None:
+            mask &= self.years >= year_min
+        if year_max is not None:
+            mask &= (self.years <= year_max) & (self.years > 0)
+        
+        return mask
+    
+    def to_arrays(self):
+        return {
+            'genre_names_data': self.genre_names.data,
+            'genre_names_offsets': self.genre_names.offsets,
+            'genre_bits': self.genre_bits,
+            'years': self.years,
+            'director_codes': self.director_codes,
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            StringColumn(arrays['genre_names_data'], arrays['genre_names_offsets']),
+            arrays['genre_bits'],
+            arrays['years'],
+            arrays['director_codes'],
+        )
 
 
 class ContentBasedRecommender:
     """Content-based recommendation system for movies"""
     
+    # Candidates considered by the diversity re-ranker, as a multiple of the requested count
+    DIVERSITY_POOL_FACTOR = 5
+    
     def __init__(self):
         self.movie_features = None
         self.similarity_matrix = None
         self.movie_indices = None
         self.tfidf_matrix = None
+        self.filter_index = None
     
     def _prepare_data(self):
         """Prepare data for content-based recommendation"""
+        import pandas as pd
+        
         # Get all movies from the database
         movies = Movie.objects.all().values(
             'imdb_id', 'name', 'year', 'genres', 
-            'director__name', 'summary_text'
+            'director_id', 'director__name', 'summary_text'
         )
         
         # Convert to DataFrame
@@ -29,9 +228,10 @@ class ContentBasedRecommender:
         df['director__name'] = df['director__name'].fillna('')
         df['summary_text'] = df['summary_text'].fillna('')
         df['year'] = df['year'].fillna('')
+        df['director_id'] = df['director_id'].fillna('')
         
         # Create a mapping from imdb_id to index
-        self.movie_indices = {movie['imdb_id']: i for i, movie in enumerate(movies)}
+        self.movie_indices = IdIndex.from_list(df['imdb_id'])
         
         # Create feature soup for each movie
         df['features'] = df.apply(self._create_feature_soup, axis=1)
@@ -51,8 +251,12 @@ class ContentBasedRecommender:
         # Combine all features
         return f"{genres} {director} {summary}".lower()
     
+    @timed('build_model')
     def build_model(self):
         """Build the recommendation model"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+        
         # Prepare data
         df = self._prepare_data()
         
@@ -63,108 +267,214 @@ class ContentBasedRecommender:
         # Calculate similarity matrix
         self.similarity_matrix = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
         
-        # Store movie features
-        self.movie_features = df[['imdb_id', 'name', 'year']]
+        # Store movie features in compact arrays rather than keeping the DataFrame
+        self.movie_features = MovieFeatures.from_records(
+            df[list(MovieFeatures.COLUMNS)].to_dict('records')
+        )
+        self.filter_index = MovieFilterIndex.from_records(
+            df[['genres', 'year', 'director_id']].to_dict('records')
+        )
         
         return True
     
-    def get_recommendations(self, movie_id, num_recommendations=10):
-        """Get movie recommendations based on a movie ID"""
+    @timed('get_recommendations')
+    def get_recommendations(self, movie_id, num_recommendations=10, genres=None, year_min=None,
+                            year_max=None, exclude_ids=(), diversity=0.0, max_per_director=None):
+        """
+        Get movie recommendations based on a movie ID.
+        
+        Filters are applied as a mask before top-K selection, so up to
+        `num_recommendations` matching movies are returned. `diversity` (0-1)
+        trades similarity to the movie for dissimilarity between the results
+        (maximal marginal relevance); `max_per_director` caps results per director.
+        """
         # Check if model is built
         if self.similarity_matrix is None:
             self.build_model()
         
         # Get movie index
-        if movie_id not in self.movie_indices:
+        movie_idx = self.movie_indices.get(movie_id)
+        if movie_idx is None:
             return []
         
-        movie_idx = self.movie_indices[movie_id]
-        
         # Get similarity scores
-        sim_scores = list(enumerate(self.similarity_matrix[movie_idx]))
+        scores = self.similarity_matrix[movie_idx]
         
-        # Sort movies based on similarity scores
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+        # Movies that may be recommended (never the movie itself)
+        if genres or year_min is not None or year_max is not None:
+            allowed = self.filter_index.mask(genres, year_min, year_max)
+        else:
+            allowed = np.ones(len(scores), dtype=bool)
+        allowed[movie_idx] = False
+        if len(exclude_ids):
+            allowed[self.movie_indices.lookup(exclude_ids)] = False
         
-        # Get top similar movies (exclude the movie itself)
-        sim_scores = sim_scores[1:num_recommendations+1]
+        reranking = diversity > 0 or max_per_director is not None
+        pool_size = num_recommendations * self.DIVERSITY_POOL_FACTOR if reranking else num_recommendations
+        movie_indices = self._top_k(scores, allowed, pool_size)
         
-        # Get movie indices
-        movie_indices = [i[0] for i in sim_scores]
+        if reranking:
+            movie_indices = self._rerank(scores, movie_indices, num_recommendations, diversity, max_per_director)
         
         # Return recommended movies
-        recommended_movies = self.movie_features.iloc[movie_indices]
+        return self.movie_features.records(movie_indices)
+    
+    def _top_k(self, scores, allowed, k):
+        """Indices of the k highest scoring allowed movies, best first"""
+        if k <= 0:
+            return np.array([], dtype=np.intp)
+        candidates = np.flatnonzero(allowed)
+        if len(candidates) > k:
+            candidates = np.sort(candidates[np.argpartition(-scores[candidates], k - 1)[:k]])
+        # Stable sort keeps lower indices first among equal scores
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+    
+    def _rerank(self, scores, candidates, k, diversity, max_per_director):
+        """Greedy MMR selection over the candidate pool, vectorized across candidates"""
+        relevance = scores[candidates]
+        pairwise = self.similarity_matrix[np.ix_(candidates, candidates)]
+        directors = self.filter_index.director_codes[candidates]
+        
+        redundancy = np.zeros(len(candidates))
+        available = np.ones(len(candidates), dtype=bool)
+        per_director = {}
+        selected = []
+        
+        while len(selected) < k and available.any():
+            mmr = (1 - diversity) * relevance - diversity * redundancy
+            best = int(np.argmax(np.where(available, mmr, -np.inf)))
+            selected.append(candidates[best])
+            available[best] = False
+            redundancy = np.maximum(redundancy, pairwise[best])
+            
+            director = directors[best]
+            if max_per_director is not None and director >= 0:
+                per_director[director] = per_director.get(director, 0) + 1
+                if per_director[director] >= max_per_director:
+                    available &= directors != director
+        
+        return selected
+    
+    def to_arrays(self):
+        """Export the built model as a dict of NumPy arrays for persisting"""
+        tfidf = self.tfidf_matrix.tocsr()
+        return {
+            **self.movie_features.to_arrays(),
+            **self.filter_index.to_arrays(),
+            **self.movie_indices.to_arrays(),
+            'similarity_matrix': self.similarity_matrix,
+            'tfidf_data': tfidf.data,
+            'tfidf_indices': tfidf.indices,
+            'tfidf_indptr': tfidf.indptr,
+            'tfidf_shape': np.array(tfidf.shape),
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a ready-to-serve recommender from arrays produced by `to_arrays`.
         
-        return recommended_movies.to_dict('records')
+        The arrays are used without copying, so they may be views onto shared memory.
+        """
+        recommender = cls()
+        recommender.movie_features = MovieFeatures.from_arrays(arrays)
+        recommender.filter_index = MovieFilterIndex.from_arrays(arrays)
+        if 'id_index_sorted' in arrays:
+            recommender.movie_indices = IdIndex.from_arrays(arrays)
+        else:
+            # Artifacts saved before the id index was persisted
+            recommender.movie_indices = IdIndex.from_list(recommender.movie_features.columns['imdb_id'].tolist())
+        recommender.similarity_matrix = arrays['similarity_matrix']
+        recommender.tfidf_matrix = csr_matrix(
+            (arrays['tfidf_data'], arrays['tfidf_indices'], arrays['tfidf_indptr']),
+            shape=tuple(arrays['tfidf_shape']),
+            copy=False,
+        )
+        return recommender
 
 
 class HybridRecommender:
     """Hybrid recommendation system combining content-based and collaborative filtering"""
     
-    def __init__(self):
-        self.content_recommender = ContentBasedRecommender()
-    
-    def get_recommendations_for_user(self, user_id, num_recommendations=10):
-        """Get personalized recommendations for a user"""
-        # Build content model if not already built
-        if self.content_recommender.similarity_matrix is None:
-            self.content_recommender.build_model()
-        
-        # Get user's highly rated movies
-        user_ratings = UserRating.objects.filter(
-            user_id=user_id, 
-            rating__gte=4.0
-        ).select_related('movie').order_by('-rating')[:5]
-        
-        # If user has no ratings, return popular movies
-        if not user_ratings:
-            return self._get_popular_movies(num_recommendations)
-        
-        # Get recommendations based on user's top rated movies
-        all_recommendations = []
-        for user_rating in user_ratings:
-            movie_recommendations = self.content_recommender.get_recommendations(
-                user_rating.movie.imdb_id, 
-                num_recommendations=3
-            )
-            all_recommendations.extend(movie_recommendations)
+    def __init__(self, content_recommender=None):
+        # A published model from the background worker; None while the first build is pending
+        self.content_recommender = content_recommender
+    
+    @timed('get_recommendations_for_user')
+    def get_recommendations_for_user(self, user_id, num_recommendations=10, exclude_ids=()):
+        """
+        Get personalized recommendations for a user, leaving out `exclude_ids`.
+        
+        Neighbours of the user's highly rated movies come first and popular
+        movies fill the rest; until a content model has been published, or
+        when the user has no high ratings, only popular movies are returned.
+        """
+        seed_movie_ids = self.get_seed_movie_ids(user_id)
+        # Twice as many as needed, since some may also be neighbours of the seeds
+        popular_movies = self.get_popular_movies(num_recommendations * 2, exclude_ids)
+        
+        return self.combine_recommendations(
+            seed_movie_ids, num_recommendations, popular_movies=popular_movies, exclude_ids=exclude_ids
+        )
+    
+    def get_seed_movie_ids(self, user_id, limit=5):
+        """Get the ids of the user's highest rated movies"""
+        return list(
+            UserRating.objects.filter(user_id=user_id, rating__gte=4.0)
+            .order_by('-rating')
+            .values_list('movie_id', flat=True)[:limit]
+        )
+    
+    def combine_recommendations(self, seed_movie_ids, num_recommendations=10,
+                                popular_movies=(), exclude_ids=()):
+        """
+        Merge content-based neighbours of the seed movies with popular movies.
+        
+        Does no database access, so async callers can fetch the seeds and the
+        popular fallback concurrently and run this in a worker thread.
+        """
+        candidates = []
+        if self.content_recommender is not None:
+            for movie_id in seed_movie_ids:
+                candidates.extend(
+                    self.content_recommender.get_recommendations(movie_id, num_recommendations=3)
+                )
+        candidates.extend(popular_movies)
         
         # Remove duplicates
         unique_recommendations = []
-        seen_ids = set()
+        seen_ids = set(exclude_ids)
         
-        for movie in all_recommendations:
+        for movie in candidates:
+            if len(unique_recommendations) >= num_recommendations:
+                break
             if movie['imdb_id'] not in seen_ids:
                 unique_recommendations.append(movie)
                 seen_ids.add(movie['imdb_id'])
-                
-                if len(unique_recommendations) >= num_recommendations:
-                    break
-        
-        # If we still need more recommendations, add popular movies
-        if len(unique_recommendations) < num_recommendations:
-            popular_movies = self._get_popular_movies(
-                num_recommendations - len(unique_recommendations)
-            )
-            
-            for movie in popular_movies:
-                if movie['imdb_id'] not in seen_ids:
-                    unique_recommendations.append(movie)
-                    seen_ids.add(movie['imdb_id'])
         
         return unique_recommendations
     
-    def _get_popular_movies(self, limit=10):
-        """Get popular movies based on rating"""
-        popular_movies = Movie.objects.filter(
-            rating_value__isnull=False
-        ).order_by('-rating_value')[:limit]
+    def get_popular_movies(self, limit=10, exclude_ids=()):
+        """
+        Get popular movies: those our users rate above average first, then by IMDb rating.
         
-        return [
-            {
-                'imdb_id': movie.imdb_id,
-                'name': movie.name,
-                'year': movie.year
-            }
-            for movie in popular_movies
-        ]
\ No newline at end of file
+        Community favourites come from the incrementally maintained
+        MovieRatingStats, ranked by its indexed `popularity`.
+        """
+        popular_movies = list(
+            MovieRatingStats.objects.filter(popularity__gt=MovieRatingStats.PRIOR_MEAN)
+            .exclude(movie_id__in=exclude_ids)
+            .order_by('-popularity')
+            .values(imdb_id=F('movie_id'), name=F('movie__name'), year=F('movie__year'))[:limit]
+        )
+        
+        if len(popular_movies) < limit:
+            seen_ids = set(exclude_ids) | {movie['imdb_id'] for movie in popular_movies}
+            popular_movies.extend(
+                Movie.objects.filter(rating_value__isnull=False)
+                .exclude(imdb_id__in=seen_ids)
+                .order_by('-rating_value')
+                .values('imdb_id', 'name', 'year')[:limit - len(popular_movies)]
+            )
+        
+        return popular_movies
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Share one loaded recommendation model between gunicorn worker processes.
+
+The gunicorn master (see ``gunicorn.conf.py``) loads the newest published
+model and copies its arrays into ``multiprocessing.shared_memory`` segments.
+The segment names are passed to workers through an environment variable, and
+each worker maps the same read-only NumPy arrays instead of holding its own
+copy of the similarity and TF-IDF data.
+"""
+import json
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .recommendation_engine import ContentBasedRecommender
+
+HANDLE_ENV = 'RECOMMENDER_SHARED_MODEL'
+
+# Segments created or attached by this process; kept referenced so they stay mapped
+_segments = []
+
+
+def publish(version_id, recommender):
+    """Copy a recommender's arrays into shared memory and advertise them to child processes"""
+    handle = {'version_id': version_id, 'arrays': {}}
+
+    for key, array in recommender.to_arrays().items():
+        array = np.ascontiguousarray(array)
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        handle['arrays'][key] = {
+            'segment': segment.name,
+            'shape': array.shape,
+            'dtype': array.dtype.str,
+        }
+        _segments.append(segment)
+
+    os.environ[HANDLE_ENV] = json.dumps(handle)
+    return handle
+
+
+def attach():
+    """
+    Map the model advertised by the parent process.
+
+    Returns ``(version_id, recommender)``, or None when no model is shared.
+    """
+    if HANDLE_ENV not in os.environ:
+        return None
+
+    handle = json.loads(os.environ[HANDLE_ENV])
+    arrays = {}
+    for key, spec in handle['arrays'].items():
+        segment = shared_memory.SharedMemory(name=spec['segment'])
+        array = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=segment.buf)
+        array.flags.writeable = False
+        arrays[key] = array
+        _segments.append(segment)
+
+    return handle['version_id'], ContentBasedRecommender.from_arrays(arrays)
+
+
+def release():
+    """
+    Unlink the segments published by this process.
+
+    Processes that already mapped them keep working; the memory is freed
+    once the last of them exits.
+    """
+    handle = json.loads(os.environ.pop(HANDLE_ENV, 'null'))
+    if handle is None:
+        return
+
+    names = {spec['segment'] for spec in handle['arrays'].values()}
+    for segment in [segment for segment in _segments if segment.name in names]:
+        _segments.remove(segment)
+        segment.unlink()
+        try:
+            segment.close()
+        except BufferError:
+            # Still referenced by arrays in this process; unmapped when they are freed
+            pass
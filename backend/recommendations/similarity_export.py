@@ -0,0 +1,122 @@
+"""
+Export every movie's top-K neighbours from a built model.
+
+The ``MovieSimilarity`` table turns unfiltered ``recommendations?movie_id=``
+requests into a single indexed lookup. JSON shards grouped by imdb_id prefix
+can be served by a static file server or CDN with no Python in the path:
+
+    <json_dir>/latest.json          {"version": 7, "prefix_length": 5, "top_k": 10}
+    <json_dir>/v7/tt012.json        {"tt0123456": [{"imdb_id": ..., "name": ..., "year": ..., "score": ...}]}
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+from django.db import transaction
+
+from .models import MovieSimilarity
+
+
+def iter_neighbors(recommender, top_k, chunk_size, order=None):
+    """
+    Yield (movie index, neighbour indices, scores) for every movie, best first.
+
+    Movies are visited in index order, or in the order of the `order` index array.
+    """
+    similarity = recommender.similarity_matrix
+    count = similarity.shape[0]
+    top_k = min(top_k, count - 1)
+    if top_k <= 0:
+        return
+    if order is None:
+        order = np.arange(count)
+
+    for start in range(0, count, chunk_size):
+        movie_indices = order[start:start + chunk_size]
+        rows = np.array(similarity[movie_indices], dtype=np.float64)
+        # A movie is never its own neighbour
+        rows[np.arange(len(rows)), movie_indices] = -np.inf
+
+        top = np.argpartition(-rows, top_k - 1, axis=1)[:, :top_k]
+        top_scores = np.take_along_axis(rows, top, axis=1)
+        ranking = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, ranking, axis=1)
+        top_scores = np.take_along_axis(top_scores, ranking, axis=1)
+
+        for offset, movie_idx in enumerate(movie_indices):
+            yield int(movie_idx), top[offset], top_scores[offset]
+
+
+def export_to_table(version, recommender, top_k=10, chunk_size=1000):
+    """Replace the MovieSimilarity rows with this version's neighbours, inserting in chunks"""
+    imdb_ids = recommender.movie_features.columns['imdb_id'].tolist()
+    batch = []
+
+    with transaction.atomic():
+        MovieSimilarity.objects.filter(version=version).delete()
+        for movie_idx, neighbors, scores in iter_neighbors(recommender, top_k, chunk_size):
+            batch.append(MovieSimilarity(
+                version=version,
+                movie_id=imdb_ids[movie_idx],
+                neighbor_ids=[imdb_ids[i] for i in neighbors],
+                scores=[round(float(score), 6) for score in scores],
+            ))
+            if len(batch) >= chunk_size:
+                MovieSimilarity.objects.bulk_create(batch)
+                batch = []
+        MovieSimilarity.objects.bulk_create(batch)
+
+        # Readers take the newest version present, so older rows can go in the same transaction
+        MovieSimilarity.objects.exclude(version=version).delete()
+
+    return len(imdb_ids)
+
+
+def _write_shard(directory, prefix, movies):
+    with open(os.path.join(directory, f'{prefix}.json'), 'w', encoding='utf-8') as fh:
+        json.dump(movies, fh, ensure_ascii=False, separators=(',', ':'))
+
+
+def export_to_json(version, recommender, json_dir, top_k=10, prefix_length=5, chunk_size=1000):
+    """
+    Write neighbour lists as JSON shards keyed by imdb_id prefix, then point latest.json at them.
+
+    Movies are scored grouped by prefix, so only the shard being filled is held in memory.
+    """
+    features = recommender.movie_features
+    imdb_ids = features.columns['imdb_id'].tolist()
+    prefixes = [imdb_id[:prefix_length] for imdb_id in imdb_ids]
+    order = np.array(sorted(range(len(imdb_ids)), key=prefixes.__getitem__), dtype=np.int64)
+
+    version_dir = os.path.join(json_dir, f'v{version.pk}')
+    tmp_dir = f'{version_dir}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    shard_count = 0
+    prefix, movies = None, {}
+    for movie_idx, neighbors, scores in iter_neighbors(recommender, top_k, chunk_size, order):
+        if prefixes[movie_idx] != prefix:
+            if movies:
+                _write_shard(tmp_dir, prefix, movies)
+                shard_count += 1
+            prefix, movies = prefixes[movie_idx], {}
+        records = features.records(neighbors)
+        for record, score in zip(records, scores):
+            record['score'] = round(float(score), 6)
+        movies[imdb_ids[movie_idx]] = records
+    if movies:
+        _write_shard(tmp_dir, prefix, movies)
+        shard_count += 1
+
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(tmp_dir, version_dir)
+
+    # Switch readers over only once every shard of the new version exists
+    latest_tmp = os.path.join(json_dir, '.latest.json.tmp')
+    with open(latest_tmp, 'w', encoding='utf-8') as fh:
+        json.dump({'version': version.pk, 'prefix_length': prefix_length, 'top_k': top_k}, fh)
+    os.replace(latest_tmp, os.path.join(json_dir, 'latest.json'))
+
+    return shard_count
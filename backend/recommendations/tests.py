@@ -1,3 +1,110 @@
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .recommendation_engine import ContentBasedRecommender, IdIndex, MovieFeatures, MovieFilterIndex
+
+# imdb_id, genres, year, director_id; the first movie is the one recommendations are asked for
+MOVIES = [
+    ('tt0', ['Comedy'], '1990', 'nm1'),
+    ('tt1', [' Comedy', 'Drama'], '1995', 'nm1'),
+    ('tt2', ['Comedy'], '1995 TV Movie', 'nm1'),
+    ('tt3', ['Drama'], '2001', 'nm2'),
+    ('tt4', ['Horror'], None, 'nm2'),
+    ('tt5', ['Comedy'], '', ''),
+    ('tt6', [], '2010', ''),
+]
+
+# Similarity of tt0 to each movie; tt1 and tt2 are near-duplicates of each other
+SIMILARITY_TO_QUERY = [1.0, 0.9, 0.8, 0.7, 0.6, 0.6, 0.1]
+
+
+def build_recommender():
+    """A recommender over MOVIES with a hand-built symmetric similarity matrix"""
+    count = len(MOVIES)
+    similarity = np.full((count, count), 0.1)
+    similarity[0, :] = similarity[:, 0] = SIMILARITY_TO_QUERY
+    similarity[1, 2] = similarity[2, 1] = 0.99
+    np.fill_diagonal(similarity, 1.0)
+
+    records = [
+        {'imdb_id': imdb_id, 'name': f'Movie {imdb_id}', 'year': year or '', 'genres': genres,
+         'director_id': director_id}
+        for imdb_id, genres, year, director_id in MOVIES
+    ]
+    recommender = ContentBasedRecommender()
+    recommender.movie_features = MovieFeatures.from_records(records)
+    recommender.filter_index = MovieFilterIndex.from_records(records)
+    recommender.movie_indices = IdIndex.from_list([record['imdb_id'] for record in records])
+    recommender.similarity_matrix = similarity
+    return recommender
+
+
+def ids(recommendations):
+    return [movie['imdb_id'] for movie in recommendations]
+
+
+class MovieFilterIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_recommender().filter_index
+
+    def matching(self, **filters):
+        return [MOVIES[i][0] for i in np.flatnonzero(self.index.mask(**filters))]
+
+    def test_genres_match_any_ignoring_case_and_whitespace(self):
+        self.assertEqual(self.matching(genres=['comedy']), ['tt0', 'tt1', 'tt2', 'tt5'])
+        self.assertEqual(self.matching(genres=[' Drama ', 'horror']), ['tt1', 'tt3', 'tt4'])
+
+    def test_unknown_genre_matches_nothing(self):
+        self.assertEqual(self.matching(genres=['Western']), [])
+
+    def test_year_range_parses_prefixed_years_and_skips_unknown(self):
+        self.assertEqual(self.matching(year_min=1995), ['tt1', 'tt2', 'tt3', 'tt6'])
+        self.assertEqual(self.matching(year_max=1995), ['tt0', 'tt1', 'tt2'])
+
+    def test_genre_and_year_combined(self):
+        self.assertEqual(self.matching(genres=['Comedy'], year_min=1991, year_max=2000), ['tt1', 'tt2'])
+
+    def test_round_trips_through_arrays(self):
+        restored = MovieFilterIndex.from_arrays(self.index.to_arrays())
+        filters = {'genres': ['Drama'], 'year_min': 2000}
+        np.testing.assert_array_equal(restored.mask(**filters), self.index.mask(**filters))
+
+
+class ContentBasedRecommenderTests(SimpleTestCase):
+    def setUp(self):
+        self.recommender = build_recommender()
+
+    def test_best_first_without_the_movie_itself(self):
+        self.assertEqual(ids(self.recommender.get_recommendations('tt0', 3)), ['tt1', 'tt2', 'tt3'])
+
+    def test_ties_keep_index_order(self):
+        self.assertEqual(ids(self.recommender.get_recommendations('tt0', 5))[3:], ['tt4', 'tt5'])
+
+    def test_unknown_movie(self):
+        self.assertEqual(self.recommender.get_recommendations('tt404', 3), [])
+
+    def test_filters_return_k_matches_when_more_match(self):
+        recommendations = self.recommender.get_recommendations('tt0', 2, genres=['Comedy'])
+        self.assertEqual(ids(recommendations), ['tt1', 'tt2'])
+        recommendations = self.recommender.get_recommendations('tt0', 2, year_min=2000)
+        self.assertEqual(ids(recommendations), ['tt3', 'tt6'])
+
+    def test_filters_return_fewer_when_fewer_match(self):
+        self.assertEqual(ids(self.recommender.get_recommendations('tt0', 5, genres=['Horror'])), ['tt4'])
+
+    def test_exclude_ids(self):
+        recommendations = self.recommender.get_recommendations('tt0', 3, exclude_ids=['tt1', 'tt3', 'tt404'])
+        self.assertEqual(ids(recommendations), ['tt2', 'tt4', 'tt5'])
+
+    def test_max_per_director(self):
+        recommendations = ids(self.recommender.get_recommendations('tt0', 4, max_per_director=1))
+        # tt1 and tt2 share nm1, tt3 and tt4 share nm2; movies without a director are never capped
+        self.assertEqual(recommendations, ['tt1', 'tt3', 'tt5', 'tt6'])
+
+    def test_diversity_skips_near_duplicates(self):
+        self.assertEqual(ids(self.recommender.get_recommendations('tt0', 2)), ['tt1', 'tt2'])
+        self.assertEqual(ids(self.recommender.get_recommendations('tt0', 2, diversity=0.5)), ['tt1', 'tt3'])
+
+    def test_filters_apply_before_reranking(self):
+        recommendations = self.recommender.get_recommendations('tt0', 3, genres=['Comedy'], max_per_director=1)
+        self.assertEqual(ids(recommendations), ['tt1', 'tt5'])